@@ -1,10 +1,86 @@
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, Patch
 import dash
+from functools import lru_cache
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 import dash_bootstrap_components as dbc
 import pandas as pd
+from numba import njit
+
+HOVER_TEMPLATE = (
+    "Interval {}:<br>"
+    "Average: {:.2f} mm<br>"
+    "Range: {:.2f} - {:.2f} mm<br>"
+    "Std Dev: {:.2f}<br>"
+    "Measurements: {}"
+)
+EMPTY_HOVER_TEMPLATE = "No data for interval {}"
+# Parts of the growth lines layout that change from one tube to another
+TUBE_LAYOUT_KEYS = ("title", "xaxis", "yaxis", "shapes")
+
+
+@njit(cache=True, fastmath=True)
+def smooth_data(positions, lengths, interval_positions, window=5):
+    """Moving-average smooth lengths and sample them at interval_positions.
+
+    Fuses the unit-step linear interpolation, the window-sized moving average
+    and the final resampling into a single pass. positions and
+    interval_positions must be sorted ascending.
+    """
+    n_positions = positions.shape[0]
+    n_intervals = interval_positions.shape[0]
+    final_lengths = np.empty(n_intervals, dtype=np.float64)
+
+    start = positions[0]
+    n_steps = int(positions[n_positions - 1] - start) + 1
+    if n_steps < window:
+        # Too few positions to fill a single window, fall back to plain interpolation
+        final_lengths[:] = np.interp(interval_positions, positions, lengths)
+        return final_lengths
+
+    half = window // 2
+    ring = np.zeros(window, dtype=np.float64)
+    running_sum = 0.0
+    segment = 0
+    out = 0
+    prev_x = 0.0
+    prev_y = 0.0
+
+    for step in range(n_steps):
+        # Linear interpolation at this unit step
+        x = start + step
+        while segment < n_positions - 2 and positions[segment + 1] < x:
+            segment += 1
+        x0 = positions[segment]
+        x1 = positions[segment + 1]
+        y0 = lengths[segment]
+        value = y0 + (lengths[segment + 1] - y0) * (x - x0) / (x1 - x0)
+
+        # Running moving-average window
+        running_sum += value - ring[step % window]
+        ring[step % window] = value
+        if step < window - 1:
+            continue
+
+        # Resample the smoothed curve at the requested interval positions
+        smooth_x = start + step - window + 1 + half
+        smooth_y = running_sum / window
+        while out < n_intervals and interval_positions[out] <= smooth_x:
+            if step == window - 1:
+                final_lengths[out] = smooth_y
+            else:
+                weight = (interval_positions[out] - prev_x) / (smooth_x - prev_x)
+                final_lengths[out] = prev_y + (smooth_y - prev_y) * weight
+            out += 1
+        prev_x = smooth_x
+        prev_y = smooth_y
+
+    while out < n_intervals:
+        final_lengths[out] = prev_y
+        out += 1
+    return final_lengths
 
 
 class DashApp:
@@ -18,7 +94,20 @@ class DashApp:
             external_stylesheets=[dbc.themes.BOOTSTRAP],
             suppress_callback_exceptions=True,
             update_title=None,
+            # gzip the figure JSON sent to the embedded web view
+            compress=True,
+        )
+        # Styling shared by the plain views, built once on top of the default theme
+        self._layout_template = go.layout.Template(pio.templates["plotly"])
+        self._layout_template.layout.update(
+            margin=dict(l=50, r=50, t=50, b=50),
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="white",
         )
+        # plotly.js ignores a template's size, so every figure sets its own
+        self._figure_size = dict(height=700, width=1000)
+        # The cache is bound per instance so self is not part of the key
+        self._growth_lines_cache = lru_cache(maxsize=64)(self._growth_lines_figure)
         self._setup_layout()
         self._setup_callbacks()
 
@@ -139,6 +228,16 @@ class DashApp:
                         ),
                         # Hidden store for caching
                         dcc.Store(id="cached-data"),
+                        # Figures for the fixed views, swapped client-side
+                        dcc.Store(
+                            id="figures-store",
+                            data={
+                                "stacked": self.create_stacked_bar_chart().to_plotly_json(),
+                                "time": self.show_growth_over_time().to_plotly_json(),
+                            },
+                        ),
+                        # Growth lines figure for the selected tube
+                        dcc.Store(id="lines-figure"),
                     ],
                     fluid=True,
                     className="px-4",
@@ -149,9 +248,33 @@ class DashApp:
     def _setup_callbacks(self):
         """Define Dash callbacks."""
 
+        # Swapping between precomputed figures is a lookup, keep it in the browser
+        self.app.clientside_callback(
+            """
+            function(viewType, linesFigure, figures) {
+                if (viewType === "lines") {
+                    // Only show the figure once the server has stored it for
+                    // the selected tube, not the one left from the last visit
+                    const triggered = window.dash_clientside.callback_context.triggered;
+                    const stored = triggered.some(
+                        (t) => t.prop_id === "lines-figure.data"
+                    );
+                    return stored && linesFigure
+                        ? linesFigure
+                        : window.dash_clientside.no_update;
+                }
+                return figures[viewType] || figures["stacked"];
+            }
+            """,
+            Output("main-graph", "figure"),
+            Input("view-selector", "value"),
+            Input("lines-figure", "data"),
+            State("figures-store", "data"),
+        )
+
         @self.app.callback(
             [
-                Output("main-graph", "figure"),
+                Output("lines-figure", "data"),
                 Output("click-data", "children"),
                 Output("back-button", "className"),
                 Output("tube-selector", "style"),
@@ -163,13 +286,16 @@ class DashApp:
                 Input("main-graph", "clickData"),
                 Input("back-button", "n_clicks"),
             ],
+            State("tube-selector", "style"),
         )
-        def update_visualization(view_type, selected_tube, click_data, n_clicks):
+        def update_visualization(
+            view_type, selected_tube, click_data, n_clicks, selector_style
+        ):
             ctx = dash.callback_context
             if not ctx.triggered:
-                # Initial load - show stacked view by default
+                # Initial load - stacked view is shown by the clientside callback
                 return (
-                    self.create_stacked_bar_chart(),  # Changed default view
+                    dash.no_update,
                     "",
                     "mt-2 d-none",
                     {"display": "none"},
@@ -179,44 +305,38 @@ class DashApp:
             trigger_id = ctx.triggered[0]["prop_id"].split(".")[0]
 
             try:
-                if view_type == "stacked":
-                    return (
-                        self.create_stacked_bar_chart(),
-                        "",
-                        "mt-2 d-none",
-                        {"display": "none"},
-                        [],
-                    )
-
-                elif view_type == "lines":
-                    tube_options = [
-                        {"label": f"Tube {tube}", "value": tube}
-                        for tube in self.data_processor.get_unique_tubes()
-                    ]
-
+                if view_type == "lines":
                     if trigger_id == "view-selector":
-                        first_tube = self.data_processor.get_unique_tubes()[0]
+                        tubes = self.data_processor.get_unique_tubes()
+                        tube_options = [
+                            {"label": f"Tube {tube}", "value": tube} for tube in tubes
+                        ]
                         return (
-                            self.show_growth_lines(first_tube),
-                            "",
+                            self.show_growth_lines(tubes[0]),
+                            dash.no_update,
                             "mt-2",
                             {"display": "block"},
                             tube_options,
                         )
 
                     if trigger_id == "tube-selector" and selected_tube:
+                        # Selector and back button are already shown for this view
                         return (
-                            self.show_growth_lines(selected_tube),
-                            "",
-                            "mt-2",
-                            {"display": "block"},
-                            tube_options,
+                            self.growth_lines_patch(selected_tube),
+                            dash.no_update,
+                            dash.no_update,
+                            dash.no_update,
+                            dash.no_update,
                         )
 
-                elif view_type == "time":
+                elif view_type in ("stacked", "time"):
+                    # Only the figure changes between these views, which the
+                    # clientside callback handles
+                    if selector_style == {"display": "none"}:
+                        return dash.no_update
                     return (
-                        self.show_growth_over_time(),
-                        "",
+                        dash.no_update,
+                        dash.no_update,
                         "mt-2 d-none",
                         {"display": "none"},
                         [],
@@ -232,7 +352,11 @@ class DashApp:
         """Generate the overview figure."""
         df = self.data_processor.df
         if view_type == "separate":
-            lengths = df.groupby("tube_date")["Length (mm)"].sum().reset_index()
+            lengths = (
+                df.groupby("tube_date", observed=True)["Length (mm)"]
+                .sum()
+                .reset_index()
+            )
             x_values = lengths["tube_date"]
             title = "Root Length Overview by Date"
         else:
@@ -257,42 +381,75 @@ class DashApp:
             yaxis_title="Total Length (mm)",
             clickmode="event+select",
             xaxis_tickangle=-45,
+            template=self._layout_template,
             autosize=True,
-            margin=dict(l=50, r=50, t=50, b=50),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="white",
-            height=700,
-            width=1000,
+            **self._figure_size,
         )
         return fig
 
     def show_growth_lines(self, selected_tube):
-        """Generate growth lines figure for a selected tube."""
+        """Generate growth lines figure for a selected tube, as a JSON dict."""
+        return self._growth_lines_cache(int(selected_tube))
+
+    def growth_lines_patch(self, selected_tube):
+        """Patch the stored growth lines figure over to another tube.
+
+        Only the traces and the tube-dependent parts of the layout are sent,
+        the template, legend and margins are left as they are.
+        """
+        figure = self.show_growth_lines(selected_tube)
+        layout = figure["layout"]
+        if not all(key in layout for key in TUBE_LAYOUT_KEYS):
+            # The figure failed to build completely, replace it outright
+            return figure
+
+        patch = Patch()
+        patch["data"] = figure["data"]
+        for key in TUBE_LAYOUT_KEYS:
+            patch["layout"][key] = layout[key]
+        return patch
+
+    def _growth_lines_figure(self, selected_tube):
+        """Build the growth lines figure JSON, cached per tube."""
         df = self.data_processor.df
         fig = go.Figure()
 
         try:
-            tube_data = df[df["Tube"] == selected_tube].copy()
-            dates = sorted(tube_data["Date"].unique())
-            all_positions = sorted(tube_data["Position"].unique())
-            interval_positions = all_positions[::10]  # Every 10th position
+            # Read-only slice of the tube's rows, no mask and no copy
+            tube_data = self.data_processor.get_tube_rows(selected_tube)
+            tube_meta = self.data_processor.tube_meta[selected_tube]
+            dates = tube_meta["dates"]
+            intervals = tube_meta["positions"][::10].astype(np.int64)
+            interval_positions = intervals.tolist()  # Every 10th position
+            interval_array = intervals.astype(np.float64)
+            # Interval labels only depend on the tube, format them once
+            interval_labels = [f"L{pos-5}-L{pos+5}" for pos in interval_positions]
+            interval_stats = self.interval_statistics(tube_data, dates, intervals)
 
             colors = px.colors.qualitative.Plotly
 
             for i, date in enumerate(dates):
                 date_data = tube_data[tube_data["Date"] == date]
-                position_data = (
-                    date_data.groupby("Position")["Length (mm)"].mean().reset_index()
-                )
 
-                if not position_data.empty:
-                    smoothed_lengths = self.smooth_data(
-                        position_data["Position"].values,
-                        position_data["Length (mm)"].values,
-                        interval_positions,
+                # Already sorted by Position since df is sorted by Tube, Date, Position
+                positions = date_data["Position"].to_numpy()
+                lengths = date_data["Length (mm)"].to_numpy(dtype=np.float64)
+
+                if positions.size:
+                    # Mean length per position over the sorted runs
+                    unique_positions, starts = np.unique(positions, return_index=True)
+                    counts = np.diff(np.append(starts, positions.size))
+                    mean_lengths = np.add.reduceat(lengths, starts) / counts
+
+                    smoothed_lengths = smooth_data(
+                        unique_positions.astype(np.float64),
+                        mean_lengths,
+                        interval_array,
                     )
 
-                    hover_info = self.generate_hover_info(date_data, interval_positions)
+                    hover_info = self.generate_hover_info(
+                        interval_stats[i], interval_labels
+                    )
 
                     fig.add_trace(
                         go.Scatter(
@@ -376,73 +533,80 @@ class DashApp:
                     font=dict(size=10),
                 ),
                 hovermode="closest",
-                height=700,
-                width=1000,
+                **self._figure_size,
                 margin=dict(t=80, b=60, l=80, r=120),
             )
         except Exception as e:
             print(f"Error generating growth lines: {e}")
 
-        return fig
-
-    def smooth_data(self, positions, lengths, interval_positions, window=5):
-        """Apply moving average smoothing to data."""
-        try:
-            interp_positions = np.arange(min(positions), max(positions) + 1)
-            interp_lengths = np.interp(interp_positions, positions, lengths)
-
-            kernel = np.ones(window) / window
-            smoothed = np.convolve(interp_lengths, kernel, mode="valid")
-            smoothed_positions = interp_positions[
-                window // 2 : -(window // 2) if window // 2 > 0 else None
-            ]
+        return fig.to_plotly_json()
+
+    def interval_statistics(self, tube_data, dates, intervals):
+        """Compute length statistics within 5 positions of each interval position.
+
+        Intervals are at least 10 positions apart, so a measurement can only
+        fall in the intervals directly below and above it. Both memberships
+        are gathered and a single groupby produces a
+        (dates, intervals, [mean, min, max, std, count]) array.
+        """
+        positions = tube_data["Position"].to_numpy().astype(np.int64)
+        below = np.searchsorted(intervals, positions, side="right") - 1
+        above = below + 1
+        last = len(intervals) - 1
+        near_below = (below >= 0) & (positions - intervals[below.clip(0)] <= 5)
+        near_above = (above <= last) & (
+            intervals[above.clip(None, last)] - positions <= 5
+        )
 
-            final_lengths = np.interp(interval_positions, smoothed_positions, smoothed)
-            return final_lengths
-        except Exception as e:
-            print(f"Error smoothing data: {e}")
-            return lengths
+        rows = np.concatenate([np.flatnonzero(near_below), np.flatnonzero(near_above)])
+        binned = tube_data.iloc[rows][["Date", "Length (mm)"]].assign(
+            bin=np.concatenate([below[near_below], above[near_above]])
+        )
+        stats = binned.groupby(["Date", "bin"])["Length (mm)"].agg(
+            ["mean", "min", "max", "std", "count"]
+        )
+        stats = stats.reindex(
+            pd.MultiIndex.from_product(
+                [dates, range(len(intervals))], names=["Date", "bin"]
+            )
+        )
+        return stats.to_numpy(dtype=np.float64).reshape(len(dates), len(intervals), 5)
 
-    def generate_hover_info(self, date_data, interval_positions):
+    def generate_hover_info(self, interval_stats, interval_labels):
         """Generate hover information for growth lines."""
         hover_info = []
-        for pos in interval_positions:
-            interval_values = date_data[
-                (date_data["Position"] >= pos - 5) & (date_data["Position"] <= pos + 5)
-            ]["Length (mm)"]
-
-            if not interval_values.empty:
-                avg_length = interval_values.mean()
-                max_length = interval_values.max()
-                min_length = interval_values.min()
-                std_dev = interval_values.std()
-                n_measurements = len(interval_values)
-
-                hover_text = (
-                    f"Interval L{pos-5}-L{pos+5}:<br>"
-                    f"Average: {avg_length:.2f} mm<br>"
-                    f"Range: {min_length:.2f} - {max_length:.2f} mm<br>"
-                    f"Std Dev: {std_dev:.2f}<br>"
-                    f"Measurements: {n_measurements}"
+        for label, (avg_length, min_length, max_length, std_dev, n_measurements) in zip(
+            interval_labels, interval_stats.tolist()
+        ):
+            if n_measurements > 0:
+                hover_text = HOVER_TEMPLATE.format(
+                    label,
+                    avg_length,
+                    min_length,
+                    max_length,
+                    std_dev,
+                    int(n_measurements),
                 )
             else:
-                hover_text = f"No data for interval L{pos-5}-L{pos+5}"
+                hover_text = EMPTY_HOVER_TEMPLATE.format(label)
 
             hover_info.append(hover_text)
         return hover_info
 
     def show_sections(self, tube_info):
         """Generate sections figure based on tube information."""
-        df = self.data_processor.df
         try:
+            tube = int(tube_info.split(" ")[1])
+            tube_data = self.data_processor.get_tube_rows(tube)
             if "(" in tube_info:
-                tube = int(tube_info.split(" ")[1])
                 date_str = tube_info.split("(")[1].rstrip(")")
                 date = pd.to_datetime(date_str)
-                section_data = df[(df["Tube"] == tube) & (df["Date"] == date)]
+                # Dates are sorted within a tube, so the date's rows are a slice too
+                first = tube_data["Date"].searchsorted(date, side="left")
+                last = tube_data["Date"].searchsorted(date, side="right")
+                section_data = tube_data.iloc[first:last]
             else:
-                tube = int(tube_info.split(" ")[1])
-                section_data = df[df["Tube"] == tube]
+                section_data = tube_data
 
             section_lengths = (
                 section_data.groupby("Position")["Length (mm)"].mean().reset_index()
@@ -464,12 +628,9 @@ class DashApp:
                 xaxis_title="Position",
                 yaxis_title="Length (mm)",
                 clickmode="event+select",
+                template=self._layout_template,
                 autosize=True,
-                margin=dict(l=50, r=50, t=50, b=50),
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="white",
-                height=700,
-                width=1000,
+                **self._figure_size,
             )
             return fig
         except Exception as e:
@@ -478,12 +639,11 @@ class DashApp:
 
     def show_time_series(self, tube_info, position):
         """Generate time series figure for a specific tube and position."""
-        df = self.data_processor.df
         try:
             tube = int(tube_info.split(" ")[1])
-            time_series = df[
-                (df["Tube"] == tube) & (df["Position"] == position)
-            ].sort_values("Date")
+            # The tube's rows are sorted by Date, so only Position needs a mask
+            tube_data = self.data_processor.get_tube_rows(tube)
+            time_series = tube_data[tube_data["Position"] == position]
 
             fig = go.Figure(
                 data=[
@@ -501,12 +661,9 @@ class DashApp:
                 title=f"Growth Over Time - Tube {tube}, Position L{position}",
                 xaxis_title="Date",
                 yaxis_title="Length (mm)",
+                template=self._layout_template,
                 autosize=True,
-                margin=dict(l=50, r=50, t=50, b=50),
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="white",
-                height=700,
-                width=1000,
+                **self._figure_size,
             )
             return fig
         except Exception as e:
@@ -518,15 +675,21 @@ class DashApp:
         df = self.data_processor.df
         fig = go.Figure()
         try:
-            for tube in self.data_processor.get_unique_tubes():
-                tube_data = df[df["Tube"] == tube].sort_values("Date")
-                grouped = tube_data.groupby("Date")["Length (mm)"].sum().reset_index()
+            # One Date x Tube matrix of total lengths instead of a groupby per tube
+            totals = (
+                df.groupby(["Tube", "Date"], sort=True)["Length (mm)"]
+                .sum()
+                .unstack("Tube")
+            )
+            for tube in totals.columns:
                 fig.add_trace(
                     go.Scatter(
-                        x=grouped["Date"],
-                        y=grouped["Length (mm)"],
+                        x=totals.index,
+                        y=totals[tube].to_numpy(),
                         mode="lines+markers",
                         name=f"Tube {int(tube)}",
+                        # Dates a tube was not measured on are NaN, bridge them
+                        connectgaps=True,
                     )
                 )
 
@@ -535,12 +698,9 @@ class DashApp:
                 xaxis_title="Date",
                 yaxis_title="Total Length (mm)",
                 showlegend=True,
+                template=self._layout_template,
                 autosize=True,
-                margin=dict(l=50, r=50, t=50, b=50),
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="white",
-                height=700,
-                width=1000,
+                **self._figure_size,
             )
             return fig
         except Exception as e:
@@ -609,8 +769,7 @@ class DashApp:
                 xaxis_title="Tube",
                 yaxis_title="Total Length (mm)",
                 legend_title="Measurement Date",
-                height=700,
-                width=1000,
+                **self._figure_size,
                 showlegend=True,
                 hovermode="x unified",
                 plot_bgcolor="white",
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -7,26 +8,33 @@ class DataProcessor:
     def __init__(self, csv_path):
         self.csv_path = csv_path
         self.df = self._load_and_prepare_data()
+        self.tube_meta = self._build_tube_meta()
 
     def _load_and_prepare_data(self):
         """Load and preprocess data from CSV."""
         try:
-            df = pd.read_csv(self.csv_path)
-            # Convert Date to datetime
-            df["Date"] = pd.to_datetime(df["Date"], format="%Y.%m.%d", errors="coerce")
-
-            # Convert numeric columns
-            df["Tube"] = pd.to_numeric(df["Tube"], downcast="integer", errors="coerce")
-            df["Position"] = pd.to_numeric(
-                df["Position"], downcast="integer", errors="coerce"
-            )
-            df["Length (mm)"] = pd.to_numeric(
-                df["Length (mm)"], downcast="float", errors="coerce"
+            # Parse only the plotted columns with an explicit schema. Failed
+            # images are written with blank fields, hence the nullable ints.
+            df = pd.read_csv(
+                self.csv_path,
+                engine="pyarrow",
+                usecols=["Tube", "Position", "Date", "Length (mm)"],
+                dtype={
+                    "Tube": "UInt16",
+                    "Position": "UInt16",
+                    "Length (mm)": "float32",
+                },
+                parse_dates=["Date"],
+                date_format="%Y.%m.%d",
             )
 
             # Drop rows with any NaN values
             df.dropna(inplace=True)
 
+            # Narrow dtypes now that the NaN rows are gone
+            df["Tube"] = df["Tube"].astype("uint16")
+            df["Position"] = df["Position"].astype("uint16")
+
             # Pre-compute identifiers
             df["tube_date"] = df.apply(
                 lambda x: f"Tube {int(x['Tube'])} ({x['Date'].strftime('%Y-%m-%d')})",
@@ -35,11 +43,38 @@ class DataProcessor:
             df["tube_position"] = df.apply(
                 lambda x: f"Tube {int(x['Tube'])}_L{int(x['Position'])}", axis=1
             )
-            return df
+
+            # Identifiers repeat heavily, store them as categories
+            df["tube_date"] = df["tube_date"].astype("category")
+            df["tube_position"] = df["tube_position"].astype("category")
+
+            # Sort once so per-tube and per-date subsets come out in order
+            df = df.sort_values(["Tube", "Date", "Position"], kind="mergesort")
+            return df.reset_index(drop=True)
         except Exception as e:
             print(f"Error loading CSV: {e}")
             return pd.DataFrame()
 
+    def _build_tube_meta(self):
+        """Pre-compute the row range, sorted dates and positions of every tube."""
+        if self.df.empty:
+            return {}
+        return {
+            # df is sorted by Tube and Date, so each tube is a contiguous block
+            # of rows and its dates come out in order
+            int(tube): {
+                "rows": slice(group.index[0], group.index[-1] + 1),
+                "dates": pd.DatetimeIndex(group["Date"].unique()),
+                "positions": np.unique(group["Position"].to_numpy()),
+            }
+            for tube, group in self.df.groupby("Tube", sort=False)
+        }
+
+    def get_tube_rows(self, tube):
+        """Return the rows of a tube as a slice of df, empty if it is unknown."""
+        meta = self.tube_meta.get(int(tube))
+        return self.df.iloc[meta["rows"] if meta else slice(0, 0)]
+
     def get_unique_tubes(self):
         """Return sorted unique tubes."""
         return sorted(self.df["Tube"].unique())
@@ -9,11 +9,62 @@ from PyQt6.QtWidgets import (
     QGraphicsPixmapItem,
 )
 from PyQt6.QtGui import QPixmap, QImage, QPainter, QWheelEvent
-from PyQt6.QtCore import Qt, QUrl
+from PyQt6.QtCore import (
+    Qt,
+    QUrl,
+    QTimer,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    pyqtSignal,
+)
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 import cv2
 import numpy as np
 import os
+from numba import njit, prange
+from util.qimage import qimage_to_array
+
+
+@njit(parallel=True, cache=True)
+def blend_overlay(image, mask, color, alpha):
+    """Blend color into the BGR channels of image wherever mask is set, in place."""
+    inv_alpha = 1.0 - alpha
+    for y in prange(image.shape[0]):
+        for x in range(image.shape[1]):
+            if mask[y, x]:
+                for c in range(3):
+                    image[y, x, c] = np.uint8(
+                        color[c] * alpha + image[y, x, c] * inv_alpha
+                    )
+
+
+# Compile (or load from the cache) now rather than on the first overlay click.
+# The arguments match the overlay's: a contiguous BGRA view of a 32-bit QImage,
+# a boolean mask, a uint8 colour and a float alpha.
+blend_overlay(
+    np.zeros((1, 1, 4), dtype=np.uint8),
+    np.zeros((1, 1), dtype=np.bool_),
+    np.zeros(4, dtype=np.uint8),
+    0.5,
+)
+
+
+class ImageLoadSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+
+
+class ImageLoadWorker(QRunnable):
+    """Decode an image file on a QThreadPool thread."""
+
+    def __init__(self, path, signals):
+        super().__init__()
+        self.path = path
+        self.signals = signals
+
+    def run(self):
+        # QImage, unlike QPixmap, is safe to create outside the GUI thread
+        self.signals.loaded.emit(self.path, QImage(self.path))
 
 
 class MagnifyingGraphicsView(QGraphicsView):
@@ -25,6 +76,13 @@ class MagnifyingGraphicsView(QGraphicsView):
             QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing
         )
         self.zoom = 1
+        self.pending_zoom = 1.0
+
+        # Coalesce bursts of wheel events into a single scale per frame
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(16)
+        self.zoom_timer.timeout.connect(self.apply_pending_zoom)
 
     def wheelEvent(self, event: QWheelEvent):
         if event.angleDelta().y() > 0:
@@ -33,7 +91,13 @@ class MagnifyingGraphicsView(QGraphicsView):
         else:
             factor = 0.8
             self.zoom *= factor
-        self.scale(factor, factor)
+        self.pending_zoom *= factor
+        if not self.zoom_timer.isActive():
+            self.zoom_timer.start()
+
+    def apply_pending_zoom(self):
+        self.scale(self.pending_zoom, self.pending_zoom)
+        self.pending_zoom = 1.0
 
 
 class BasicViewWidget(QWidget):
@@ -91,6 +155,13 @@ class DisplayController:
         self.current_fake_image = None
         self.html_path = None
 
+        # Decoded images for the current selection, keyed by file path
+        self.loaded_images = {}
+        self.wanted_paths = ()
+        self.pending_loads = set()
+        self.image_loader = ImageLoadSignals()
+        self.image_loader.loaded.connect(self.on_image_loaded)
+
     def setup_display_area(self, parent):
         layout = QVBoxLayout(parent)
 
@@ -137,6 +208,7 @@ class DisplayController:
 
     def update_display(self):
         view_mode = self.main_window.view_mode_combo.currentText()
+        self.wanted_paths = ()
 
         # Hide both views initially
         self.magnifying_view.hide()
@@ -155,6 +227,46 @@ class DisplayController:
         else:
             self.clear_magnifying_view()
 
+    def request_images(self, paths):
+        """Return True if all paths are decoded, otherwise queue the missing ones"""
+        self.wanted_paths = tuple(paths)
+        self.loaded_images = {
+            path: self.loaded_images[path]
+            for path in self.wanted_paths
+            if path in self.loaded_images
+        }
+        missing = [path for path in self.wanted_paths if path not in self.loaded_images]
+        if not missing:
+            return True
+
+        pool = QThreadPool.globalInstance()
+        for path in missing:
+            if path not in self.pending_loads:
+                self.pending_loads.add(path)
+                pool.start(ImageLoadWorker(path, self.image_loader))
+
+        scene = QGraphicsScene()
+        scene.addText("Loading...")
+        self.magnifying_view.setScene(scene)
+        return False
+
+    def on_image_loaded(self, path, image):
+        self.pending_loads.discard(path)
+        if path not in self.wanted_paths:
+            # The selection changed while this image was decoding
+            return
+        self.loaded_images[path] = image
+        if all(p in self.loaded_images for p in self.wanted_paths):
+            self.update_display()
+
+    def load_fake_image_path(self):
+        """Look up the processed image for the current image if not known yet"""
+        if not self.current_fake_image:
+            base_name = os.path.splitext(os.path.basename(self.current_image))[0]
+            self.current_fake_image = (
+                self.main_window.image_manager.get_fake_image_path(base_name)
+            )
+
     def display_basic_view(self):
         img_manager = self.main_window.image_manager
         if img_manager.has_fake_real_pairs and img_manager.html_path:
@@ -169,7 +281,9 @@ class DisplayController:
 
     def display_single_image(self):
         if self.current_image:
-            pixmap = QPixmap(self.current_image)
+            if not self.request_images([self.current_image]):
+                return
+            pixmap = QPixmap.fromImage(self.loaded_images[self.current_image])
             self.set_magnifying_view_image(pixmap)
         else:
             self.clear_magnifying_view()
@@ -181,60 +295,52 @@ class DisplayController:
             return
 
         # Load processed image if needed
-        if not self.current_fake_image:
-            base_name = os.path.splitext(os.path.basename(self.current_image))[0]
-            self.current_fake_image = (
-                self.main_window.image_manager.get_fake_image_path(base_name)
-            )
+        self.load_fake_image_path()
 
         if not self.current_fake_image:
             print("DEBUG: No processed image available")
             self.display_single_image()  # Fallback to single image view
             return
 
-        # Rest of the overlay display code remains the same
-        real_image = QImage(self.current_image)
+        if not self.request_images([self.current_image, self.current_fake_image]):
+            return
+
+        real_image = self.loaded_images[self.current_image]
         if real_image.isNull():
             print("DEBUG: Failed to load real image")
             return
 
-        fake_image_gray = cv2.imread(self.current_fake_image, cv2.IMREAD_GRAYSCALE)
-        if fake_image_gray is None:
+        fake_image = self.loaded_images[self.current_fake_image]
+        if fake_image.isNull():
             print("DEBUG: Failed to load processed image")
             return
-
-        # Binarize the fake image using OTSU thresholding
-        _, binary_mask = cv2.threshold(
-            fake_image_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-        )
-
-        # Resize the binary mask to match the real image size if necessary
-        if (real_image.width(), real_image.height()) != (
-            binary_mask.shape[1],
-            binary_mask.shape[0],
-        ):
+        fake_image = fake_image.convertToFormat(QImage.Format.Format_Grayscale8)
+        ptr = fake_image.constBits()
+        ptr.setsize(fake_image.sizeInBytes())
+        fake_image_gray = np.frombuffer(ptr, dtype=np.uint8).reshape(
+            (fake_image.height(), fake_image.bytesPerLine())
+        )[:, : fake_image.width()]
+
+        # Create a boolean mask of the skeleton pixels (fixed threshold of 50)
+        mask = fake_image_gray >= 50
+
+        # Resize the mask to match the real image size if necessary
+        if (real_image.width(), real_image.height()) != (mask.shape[1], mask.shape[0]):
             print("DEBUG: Resizing binary mask to match real image.")
-            binary_mask = cv2.resize(
-                binary_mask,
+            mask = cv2.resize(
+                mask.view(np.uint8),
                 (real_image.width(), real_image.height()),
                 interpolation=cv2.INTER_NEAREST,
-            )
-
-        # Ensure the QImage format is ARGB32_Premultiplied for consistent handling
-        if real_image.format() != QImage.Format.Format_ARGB32_Premultiplied:
-            real_image = real_image.convertToFormat(
-                QImage.Format.Format_ARGB32_Premultiplied
-            )
+            ).view(bool)
 
-        # Convert QImage to NumPy array
-        ptr = real_image.bits()
-        ptr.setsize(real_image.sizeInBytes())
-        real_array = np.array(ptr).reshape(
-            real_image.height(), real_image.width(), 4
-        )  # BGRA
+        # Ensure the QImage format is ARGB32_Premultiplied for consistent handling.
+        # Always convert so the blend below detaches from the cached decode.
+        real_image = real_image.convertToFormat(
+            QImage.Format.Format_ARGB32_Premultiplied
+        )
 
-        # Create a boolean mask where the binary mask is active
-        mask = binary_mask >= 50  # Adjust threshold as needed
+        # View the QImage pixels as a NumPy array; edits write straight into it
+        real_array = qimage_to_array(real_image)  # BGRA
 
         # Debug information
         print(f"DEBUG: Real image shape: {real_array.shape}")
@@ -248,54 +354,17 @@ class DisplayController:
         # R (Red)    = 20
         # A (Alpha)  = 128 (semi-transparent)
 
-        # Ensure neon_green is broadcastable to the real_array
-        neon_green = neon_green.reshape(1, 1, 4)
-
-        # Extract the mask indices
-        mask_indices = np.where(mask)
-
-        # Perform alpha blending only on the RGB channels
-        alpha = neon_green[0, 0, 3] / 255.0  # Normalize alpha to [0, 1]
-        inv_alpha = 1.0 - alpha
-
-        # Blend the neon green with the original image
-        # Only modify the RGB channels; preserve the original alpha channel
-        real_array[mask_indices[0], mask_indices[1], 0] = (
-            neon_green[0, 0, 0] * alpha
-            + real_array[mask_indices[0], mask_indices[1], 0] * inv_alpha
-        ).astype(
-            np.uint8
-        )  # Blue channel
-
-        real_array[mask_indices[0], mask_indices[1], 1] = (
-            neon_green[0, 0, 1] * alpha
-            + real_array[mask_indices[0], mask_indices[1], 1] * inv_alpha
-        ).astype(
-            np.uint8
-        )  # Green channel
-
-        real_array[mask_indices[0], mask_indices[1], 2] = (
-            neon_green[0, 0, 2] * alpha
-            + real_array[mask_indices[0], mask_indices[1], 2] * inv_alpha
-        ).astype(
-            np.uint8
-        )  # Red channel
+        # Perform alpha blending only on the RGB channels; preserve the
+        # original alpha channel
+        alpha = neon_green[3] / 255.0  # Normalize alpha to [0, 1]
+        blend_overlay(real_array, mask, neon_green, alpha)
 
         # Optionally, adjust the alpha channel if you want to modify it
         # For example, keep it as is or set to maximum
-        # real_array[mask_indices[0], mask_indices[1], 3] = 255  # Full opacity
-
-        # Convert the modified NumPy array back to QImage
-        result_image = QImage(
-            real_array.data,
-            real_image.width(),
-            real_image.height(),
-            real_image.bytesPerLine(),
-            QImage.Format.Format_ARGB32_Premultiplied,
-        ).copy()  # Use .copy() to ensure the data is owned by QImage
-
-        # Convert QImage to QPixmap and set it to the view
-        result_pixmap = QPixmap.fromImage(result_image)
+        # real_array[mask, 3] = 255  # Full opacity
+
+        # real_array aliases real_image, so it already holds the overlay
+        result_pixmap = QPixmap.fromImage(real_image)
         self.set_magnifying_view_image(result_pixmap)
         print(f"DEBUG: Overlay image displayed. Size: {result_pixmap.size()}")
 
@@ -305,29 +374,29 @@ class DisplayController:
             print("DEBUG: No current image selected")
             return
 
-        # Load the original image
-        real_pixmap = QPixmap(self.current_image)
-        if real_pixmap.isNull():
-            print("DEBUG: Failed to load original image")
-            return
-
         # Try to lazy load the processed image if needed
-        if not self.current_fake_image:
-            base_name = os.path.splitext(os.path.basename(self.current_image))[0]
-            self.current_fake_image = (
-                self.main_window.image_manager.get_fake_image_path(base_name)
-            )
-            print(f"DEBUG: Lazy loading processed image for {base_name}")
+        self.load_fake_image_path()
 
-        # Create the side-by-side display
-        # Create the side-by-side display
+        paths = [self.current_image]
         if self.current_fake_image:
             # Convert _fake.png to _real.png for the processed image
             real_processed_path = self.current_fake_image.replace(
                 "_fake.png", "_real.png"
             )
-            fake_pixmap = QPixmap(self.current_fake_image)
-            real_pixmap = QPixmap(real_processed_path)
+            paths += [self.current_fake_image, real_processed_path]
+        if not self.request_images(paths):
+            return
+
+        # Load the original image
+        real_pixmap = QPixmap.fromImage(self.loaded_images[self.current_image])
+        if real_pixmap.isNull():
+            print("DEBUG: Failed to load original image")
+            return
+
+        # Create the side-by-side display
+        if self.current_fake_image:
+            fake_pixmap = QPixmap.fromImage(self.loaded_images[self.current_fake_image])
+            real_pixmap = QPixmap.fromImage(self.loaded_images[real_processed_path])
             if fake_pixmap.isNull():
                 print("DEBUG: Failed to load processed real image")
                 self.main_window.status_bar.showMessage(
@@ -142,6 +142,7 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(QLabel("Images:"))
         self.file_list = QListWidget()
+        self.file_list_items = {}  # Item text -> QListWidgetItem
         self.file_list.itemClicked.connect(self.on_image_selected)
         layout.addWidget(self.file_list)
 
@@ -150,9 +151,8 @@ class MainWindow(QMainWindow):
     def highlight_saved_mask(self, image_path):
         print(f"DEBUG: highlight_saved_mask called with image_path: {image_path}")
         image_name = os.path.splitext(os.path.basename(os.path.normpath(image_path)))[0]
-        items = self.file_list.findItems(image_name, Qt.MatchFlag.MatchExactly)
-        if items:
-            item = items[0]
+        item = self.find_file_list_item(image_name)
+        if item:
             item.setForeground(QColor("green"))
             print(f"DEBUG: Set {image_name} to green (newly saved mask)")
         else:
@@ -162,14 +162,17 @@ class MainWindow(QMainWindow):
     def unhighlight_cleared_mask(self, image_path):
         print(f"DEBUG: unhighlight_cleared_mask called with image_path: {image_path}")
         image_name = os.path.splitext(os.path.basename(os.path.normpath(image_path)))[0]
-        items = self.file_list.findItems(image_name, Qt.MatchFlag.MatchExactly)
-        if items:
-            item = items[0]
+        item = self.find_file_list_item(image_name)
+        if item:
             item.setForeground(QColor("white"))
             print(f"DEBUG: Set {image_name} to white (cleared mask)")
         else:
             print(f"DEBUG: Could not find item for {image_name}")
 
+    def find_file_list_item(self, image_name):
+        """Return the file list item for image_name, or None"""
+        return self.file_list_items.get(image_name)
+
     def create_right_panel(self):
         right_widget = QWidget()
         self.display_area = self.display_controller.setup_display_area(right_widget)
@@ -217,9 +220,11 @@ class MainWindow(QMainWindow):
     def populate_file_list(self):
         """Populate the file list without checking masks"""
         self.file_list.clear()
+        self.file_list_items = {}
         for name in self.image_manager.get_image_names():
             item = QListWidgetItem(os.path.basename(name))
             self.file_list.addItem(item)
+            self.file_list_items.setdefault(item.text(), item)
 
         self.status_bar.showMessage(
             f"Loaded {len(self.image_manager.images)} images", 5000
@@ -358,9 +363,8 @@ class MainWindow(QMainWindow):
             image_name = os.path.splitext(
                 os.path.basename(os.path.normpath(image_path))
             )[0]
-            items = self.file_list.findItems(image_name, Qt.MatchFlag.MatchExactly)
-            if items:
-                item = items[0]
+            item = self.find_file_list_item(image_name)
+            if item:
                 item.setForeground(QColor("green"))
                 print(f"DEBUG: Set {image_name} to green (newly saved mask)")
             else:
@@ -377,9 +381,8 @@ class MainWindow(QMainWindow):
             image_name = os.path.splitext(
                 os.path.basename(os.path.normpath(image_path))
             )[0]
-            items = self.file_list.findItems(image_name, Qt.MatchFlag.MatchExactly)
-            if items:
-                item = items[0]
+            item = self.find_file_list_item(image_name)
+            if item:
                 item.setForeground(QColor("white"))
                 print(f"DEBUG: Set {image_name} to white (cleared mask)")
             else:
@@ -1,23 +1,64 @@
+import os
+
+# Let the CUDA caching allocator grow segments in place instead of splitting
+# fixed blocks, so repeated batches of different sizes don't fragment memory.
+# Must be set before torch initialises CUDA; ignored on CPU-only machines.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 from PyQt6.QtWidgets import QMessageBox, QProgressBar
 from PyQt6.QtCore import QThread, pyqtSignal
 import torch
 import torchvision.transforms as transforms
 from PIL import Image
-import os
 import numpy as np
+import pickle
 from mask_model.model import ResNetSkeleton
 
 
+def autocast(device):
+    """Mixed precision on CUDA (bf16 where supported), full precision elsewhere"""
+    use_amp = device.type == "cuda"
+    amp_dtype = (
+        torch.bfloat16 if use_amp and torch.cuda.is_bf16_supported() else torch.float16
+    )
+    return torch.autocast(device.type, dtype=amp_dtype, enabled=use_amp)
+
+
+class ModelWarmupThread(QThread):
+    """Compile the model and run one dummy batch through it off the GUI thread."""
+
+    ready = pyqtSignal(object)
+
+    def __init__(self, model, batch_size):
+        super().__init__()
+        self.model = model
+        self.batch_size = batch_size
+
+    def run(self):
+        try:
+            # Batches are always padded to batch_size x 3 x 480 x 640, so a
+            # single static graph covers every run
+            compiled = torch.compile(self.model, dynamic=False)
+            device = next(self.model.parameters()).device
+            with torch.inference_mode(), autocast(device):
+                compiled(torch.zeros((self.batch_size, 3, 480, 640), device=device))
+        except Exception as e:
+            print(f"Could not compile mask generation model: {str(e)}")
+            return
+        self.ready.emit(compiled)
+
+
 class MaskGenerationThread(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, input_dir, output_dir, model):
+    def __init__(self, input_dir, output_dir, model, batch_size=4):
         super().__init__()
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.model = model
+        self.batch_size = batch_size
 
     def run(self):
         try:
@@ -40,49 +81,102 @@ class MaskGenerationThread(QThread):
                 ]
             )
 
-            # Process each image
-            for i, filename in enumerate(image_files):
-                try:
-                    # Load and transform image
-                    input_path = os.path.join(self.input_dir, filename)
-                    image = Image.open(input_path).convert("RGB")
-                    image_tensor = (
-                        transform(image)
-                        .unsqueeze(0)
-                        .to(next(self.model.parameters()).device)
-                    )
+            device = next(self.model.parameters()).device
+            # Reuse one page-locked buffer so host-to-device copies are async
+            staging = None
+            if device.type == "cuda":
+                staging = torch.empty((self.batch_size, 3, 480, 640), pin_memory=True)
 
-                    # Generate mask
-                    with torch.no_grad():
-                        mask = self.model(image_tensor)
+            # Process the images in batches of batch_size
+            for start in range(0, total_images, self.batch_size):
+                # Stop early if a newer generation run replaced this one
+                if self.isInterruptionRequested():
+                    return
 
-                    # Convert to numpy and threshold
-                    mask_np = mask.squeeze().cpu().numpy()
+                batch_files = image_files[start : start + self.batch_size]
 
-                    # Properly binarize the mask using a threshold
-                    binary_mask = (mask_np > 0.5).astype(np.uint8) * 255
+                # Load and transform images
+                filenames = []
+                tensors = []
+                for filename in batch_files:
+                    try:
+                        input_path = os.path.join(self.input_dir, filename)
+                        image = Image.open(input_path).convert("RGB")
+                        tensors.append(transform(image))
+                        filenames.append(filename)
+                    except Exception as e:
+                        print(f"Error processing {filename}: {str(e)}")
 
-                    # Convert to PIL Image
-                    mask_pil = Image.fromarray(binary_mask, mode="L")
+                if tensors:
+                    try:
+                        results = list(
+                            zip(filenames, self.predict(tensors, device, staging))
+                        )
+                    except torch.cuda.OutOfMemoryError:
+                        # The batch doesn't fit; retry its images one at a time
+                        torch.cuda.empty_cache()
+                        results = self.predict_each(filenames, tensors, device)
+                    except Exception as e:
+                        print(f"Error processing {', '.join(filenames)}: {str(e)}")
+                        results = []
 
-                    # Save binary mask
-                    output_path = os.path.join(
-                        self.output_dir, os.path.splitext(filename)[0] + ".png"
-                    )
-                    mask_pil.save(output_path, "PNG")
+                    for filename, mask_np in results:
+                        try:
+                            # Reinterpret the boolean mask as 0/1 bytes and scale to 0/255
+                            binary_mask = mask_np.view(np.uint8) * 255
 
-                    # Update progress
-                    progress = int((i + 1) / total_images * 100)
-                    self.progress.emit(progress)
+                            # Convert to PIL Image
+                            mask_pil = Image.fromarray(binary_mask, mode="L")
 
-                except Exception as e:
-                    print(f"Error processing {filename}: {str(e)}")
+                            # Save binary mask
+                            output_path = os.path.join(
+                                self.output_dir, os.path.splitext(filename)[0] + ".png"
+                            )
+                            mask_pil.save(output_path, "PNG")
+                        except Exception as e:
+                            print(f"Error processing {filename}: {str(e)}")
+
+                # Update progress
+                progress = int((start + len(batch_files)) / total_images * 100)
+                self.progress.emit(progress)
 
             self.finished.emit(self.output_dir)
 
         except Exception as e:
             self.error.emit(str(e))
 
+    def predict(self, tensors, device, staging=None):
+        """Return a boolean mask for each image tensor"""
+        count = len(tensors)
+        batch = torch.stack(tensors)
+        if staging is not None:
+            # Send the whole buffer so a short last batch has the same shape
+            # as the others and a compiled model isn't recompiled for it
+            staging[:count].copy_(batch)
+            staging[count:].zero_()
+            batch = staging.to(device, non_blocking=True)
+        else:
+            batch = batch.to(device)
+
+        # Generate masks
+        with torch.inference_mode(), autocast(device):
+            masks = self.model(batch)[:count]
+
+        # Cast the autocast output back to float32 before thresholding, as
+        # the full-precision model did. The comparison stays on the device so
+        # only a 1-byte boolean mask is copied back.
+        return (masks.float() > 0.5).squeeze(1).cpu().numpy()
+
+    def predict_each(self, filenames, tensors, device):
+        """Run a batch that ran out of memory again, one image at a time"""
+        results = []
+        for filename, tensor in zip(filenames, tensors):
+            try:
+                results.append((filename, self.predict([tensor], device)[0]))
+            except Exception as e:
+                print(f"Error processing {filename}: {str(e)}")
+        return results
+
 
 class MaskGenerationHandler:
     def __init__(self, main_window):
@@ -90,6 +184,13 @@ class MaskGenerationHandler:
         self.model = None
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.generation_thread = None
+        # Cancelled runs that are still finishing their current batch
+        self.stopping_threads = []
+        # Images per forward pass; lower it if the GPU runs out of memory
+        self.batch_size = 4
+        # Set once ModelWarmupThread has compiled the model; eager until then
+        self.compiled_model = None
+        self.warmup_thread = None
 
         # Initialize the model
         self._initialize_model()
@@ -104,12 +205,25 @@ class MaskGenerationHandler:
             )
 
             if os.path.exists(weights_path):
-                self.model = ResNetSkeleton(num_classes=1, pretrained=False)
-                self.model.load_state_dict(
-                    torch.load(weights_path, map_location=self.device)
-                )
+                state_dict = self._load_state_dict(weights_path)
+                # Build on the meta device so no weights are allocated until
+                # the checkpoint tensors are assigned in place
+                with torch.device("meta"):
+                    self.model = ResNetSkeleton(num_classes=1, pretrained=False)
+                self.model.load_state_dict(state_dict, assign=True)
                 self.model = self.model.to(self.device)
                 self.model.eval()
+                if self.device.type == "cuda":
+                    # Inputs are always resized to 480x640, so let cuDNN pick
+                    # the fastest kernels once and reuse them
+                    torch.backends.cuda.matmul.allow_tf32 = True
+                    torch.backends.cudnn.allow_tf32 = True
+                    torch.backends.cudnn.benchmark = True
+                    # Pay the compile cost in the background at startup rather
+                    # than on the user's first batch
+                    self.warmup_thread = ModelWarmupThread(self.model, self.batch_size)
+                    self.warmup_thread.ready.connect(self.on_model_compiled)
+                    self.warmup_thread.start()
                 print("Mask generation model initialized successfully")
             else:
                 print(f"Model weights not found at {weights_path}")
@@ -118,6 +232,17 @@ class MaskGenerationHandler:
             print(f"Failed to initialize mask generation model: {str(e)}")
             self.model = None
 
+    def _load_state_dict(self, weights_path):
+        """Memory-map the checkpoint instead of reading it all into RAM"""
+        try:
+            return torch.load(
+                weights_path, map_location="cpu", mmap=True, weights_only=True
+            )
+        except (pickle.UnpicklingError, RuntimeError):
+            # Legacy (non-zip) checkpoints can't be memory-mapped, and may
+            # contain objects weights_only refuses
+            return torch.load(weights_path, map_location="cpu", weights_only=False)
+
     def generate_masks(self):
         """Generate masks using the ResNet model"""
         if self.model is None:
@@ -145,9 +270,15 @@ class MaskGenerationHandler:
             output_dir = os.path.join(input_dir, "mask")
             os.makedirs(output_dir, exist_ok=True)
 
+            # Cancel a run that is still in progress before starting over
+            self.cancel_generation()
+
             # Create and start generation thread
+            model = self.model
+            if self.compiled_model is not None:
+                model = self.compiled_model
             self.generation_thread = MaskGenerationThread(
-                input_dir, output_dir, self.model
+                input_dir, output_dir, model, self.batch_size
             )
             self.generation_thread.progress.connect(self.update_progress)
             self.generation_thread.finished.connect(self.on_generation_finished)
@@ -162,10 +293,35 @@ class MaskGenerationHandler:
                 self.main_window, "Error", f"Error starting mask generation: {str(e)}"
             )
 
+    def cancel_generation(self):
+        """Stop the current run without blocking the GUI thread until it exits"""
+        self.stopping_threads = [t for t in self.stopping_threads if t.isRunning()]
+        thread = self.generation_thread
+        if thread is None or not thread.isRunning():
+            return
+        thread.requestInterruption()
+        # Its late results must not be reported as the new run's
+        thread.progress.disconnect()
+        thread.finished.disconnect()
+        thread.error.disconnect()
+        # It stops after its current batch; keep it alive until then
+        if not thread.wait(50):
+            self.stopping_threads.append(thread)
+
+    def on_model_compiled(self, compiled_model):
+        self.compiled_model = compiled_model
+        print("Mask generation model compiled")
+
     def update_progress(self, value):
         self.main_window.status_bar.showMessage(f"Generating masks... {value}%")
 
+    def release_cuda_cache(self):
+        """Return cached GPU blocks from a finished run to the driver"""
+        if self.device.type == "cuda":
+            torch.cuda.empty_cache()
+
     def on_generation_finished(self, output_dir):
+        self.release_cuda_cache()
         self.main_window.status_bar.showMessage("Mask generation completed", 5000)
         QMessageBox.information(
             self.main_window,
@@ -174,6 +330,7 @@ class MaskGenerationHandler:
         )
 
     def on_generation_error(self, error_message):
+        self.release_cuda_cache()
         self.main_window.status_bar.showMessage("Error during mask generation", 5000)
         QMessageBox.critical(
             self.main_window, "Error", f"Error during mask generation: {error_message}"
@@ -23,12 +23,47 @@ from PyQt6.QtGui import (
     QShortcut,
     QWheelEvent,
 )
-from PyQt6.QtCore import Qt, QPoint, pyqtSignal, QRectF, QEvent, QPointF
+from PyQt6.QtCore import Qt, QPoint, pyqtSignal, QRectF, QEvent, QPointF, QThread
 import os
 import numpy as np
 import cv2
 from image_normalization_interface import ImageNormalization, NormalizationControls
 from PyQt6.QtGui import QMouseEvent
+from util.qimage import qimage_to_array
+
+
+class NormalizationThread(QThread):
+    result_ready = pyqtSignal(str, object, QImage)
+
+    def __init__(self, image_path, source_image, method, params, parent=None):
+        super().__init__(parent)
+        self.image_path = image_path
+        self.source_image = source_image
+        self.method = method
+        self.params = params
+
+    def run(self):
+        try:
+            img = self.source_image
+            if img is None:
+                img = cv2.imread(self.image_path)
+
+            if self.method == "CLAHE":
+                enhanced = ImageNormalization.apply_clahe(img, **self.params)
+            else:  # Contrast Stretching
+                enhanced = ImageNormalization.apply_contrast_stretching(
+                    img, **self.params
+                )
+
+            rgb_img = cv2.cvtColor(enhanced, cv2.COLOR_BGR2RGB)
+            height, width, channel = rgb_img.shape
+            # copy() so the QImage owns its pixels once rgb_img goes away
+            q_img = QImage(
+                rgb_img.data, width, height, width * 3, QImage.Format.Format_RGB888
+            ).copy()
+            self.result_ready.emit(self.image_path, img, q_img)
+        except Exception as e:
+            print(f"Error applying normalization: {str(e)}")
 
 
 class MaskTracingGraphicsView(QGraphicsView):
@@ -38,7 +73,9 @@ class MaskTracingGraphicsView(QGraphicsView):
         self.setDragMode(QGraphicsView.DragMode.NoDrag)
         self.pan_mode = False
         self.setTransformationAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
-        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        self.setViewportUpdateMode(
+            QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate
+        )
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.drawing = False
@@ -215,6 +252,8 @@ class MaskTracingInterface(QWidget):
         self.b_key_pressed = False
         self.size_slider = None
         self.zoom_slider = None
+        self.source_image = None  # Decoded BGR array of the current image
+        self.normalization_thread = None
         self.initUI()
 
     def initUI(self):
@@ -226,7 +265,7 @@ class MaskTracingInterface(QWidget):
         self.graphics_view.setRenderHint(QPainter.RenderHint.Antialiasing)
         self.graphics_view.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
         self.graphics_view.setViewportUpdateMode(
-            QGraphicsView.ViewportUpdateMode.FullViewportUpdate
+            QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate
         )
         self.graphics_view.setTransformationAnchor(
             QGraphicsView.ViewportAnchor.AnchorUnderMouse
@@ -583,25 +622,17 @@ class MaskTracingInterface(QWidget):
         self.mask_directory = os.path.join(os.path.dirname(image_path), "mask")
         print(f"DEBUG: Set mask directory to: {self.mask_directory}")
 
+        # Drop the decoded image of the previous file
+        self.source_image = None
+
         # Clear undo/redo stacks
         self.undo_stack.clear()
         self.redo_stack.clear()
 
-        # Create a new scene and items
-        self.scene = QGraphicsScene()
-        self.graphics_view.setScene(self.scene)
-
-        # Create new graphics items
-        self.image_item = QGraphicsPixmapItem()
-        self.mask_item = QGraphicsPixmapItem()
-
-        # Add items to scene immediately
-        self.scene.addItem(self.image_item)
-        self.scene.addItem(self.mask_item)
-
-        # Set z-order
-        self.image_item.setZValue(0)
-        self.mask_item.setZValue(1)
+        # Reuse the scene and its two pixmap items; update_display swaps in
+        # the new pixmaps instead of building a fresh scene per image
+        self.image_item.setPixmap(QPixmap())
+        self.mask_item.setPixmap(QPixmap())
 
         # Load the new image
         self.image_pixmap = QPixmap(image_path)
@@ -635,11 +666,12 @@ class MaskTracingInterface(QWidget):
 
                     # Create RGBA image with transparency
                     height, width = mask_cv.shape
-                    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+                    rgba = np.empty((height, width, 4), dtype=np.uint8)
 
                     # More flexible threshold for mask detection
                     mask = mask_cv > 200  # Use middle value instead of exactly 255
-                    rgba[mask] = [255, 255, 255, 255]  # White with full opacity
+                    # White with full opacity, broadcast into all four channels
+                    rgba[...] = (mask.view(np.uint8) * 255)[..., None]
 
                     mask_qimage = QImage(
                         rgba.data,
@@ -671,8 +703,10 @@ class MaskTracingInterface(QWidget):
             self.scene.addItem(self.mask_item)
             self.mask_item.setZValue(1)
 
-        # Update the pixmaps directly
-        self.image_item.setPixmap(self.image_pixmap)
+        # Update the pixmaps directly. The image only changes on load or
+        # normalization, so skip re-setting it on every brush stroke.
+        if self.image_item.pixmap().cacheKey() != self.image_pixmap.cacheKey():
+            self.image_item.setPixmap(self.image_pixmap)
         self.mask_item.setPixmap(self.mask_pixmap)
 
         # Update scene rect only if needed
@@ -687,12 +721,17 @@ class MaskTracingInterface(QWidget):
         painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
         painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
 
-        # Create a temporary pixmap for the current stroke
-        temp_pixmap = QPixmap(self.mask_pixmap.size())
-        temp_pixmap.fill(Qt.GlobalColor.transparent)
-        temp_painter = QPainter(temp_pixmap)
-        temp_painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
-        temp_painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        # Paint the stroke straight onto the mask instead of onto a full-size
+        # temporary pixmap that is then composited over the whole mask. A
+        # single primitive gives the same result either way.
+        if self.eraser_button.isChecked():
+            painter.setCompositionMode(
+                QPainter.CompositionMode.CompositionMode_DestinationOut
+            )
+        else:
+            painter.setCompositionMode(
+                QPainter.CompositionMode.CompositionMode_SourceOver
+            )
 
         # Set up the pen and brush
         pen = QPen(
@@ -702,12 +741,12 @@ class MaskTracingInterface(QWidget):
             Qt.PenCapStyle.RoundCap,
             Qt.PenJoinStyle.RoundJoin,
         )
-        temp_painter.setPen(pen)
-        temp_painter.setBrush(QBrush(self.brush_color))
+        painter.setPen(pen)
+        painter.setBrush(QBrush(self.brush_color))
 
         # Draw the stroke
         if self.last_point:
-            temp_painter.setPen(
+            painter.setPen(
                 QPen(
                     self.brush_color,
                     self.brush_size,
@@ -716,25 +755,12 @@ class MaskTracingInterface(QWidget):
                     Qt.PenJoinStyle.RoundJoin,
                 )
             )
-            temp_painter.drawLine(self.last_point, pos)
+            painter.drawLine(self.last_point, pos)
         else:
             diameter = self.brush_size
             top_left = QPoint(pos.x() - diameter // 2, pos.y() - diameter // 2)
-            temp_painter.drawEllipse(top_left.x(), top_left.y(), diameter, diameter)
+            painter.drawEllipse(top_left.x(), top_left.y(), diameter, diameter)
 
-        temp_painter.end()
-
-        # Apply the stroke to the mask
-        if self.eraser_button.isChecked():
-            painter.setCompositionMode(
-                QPainter.CompositionMode.CompositionMode_DestinationOut
-            )
-        else:
-            painter.setCompositionMode(
-                QPainter.CompositionMode.CompositionMode_SourceOver
-            )
-
-        painter.drawPixmap(0, 0, temp_pixmap)
         painter.end()
 
         self.last_point = pos
@@ -894,11 +920,10 @@ class MaskTracingInterface(QWidget):
         image = self.mask_pixmap.toImage()
         width, height = image.width(), image.height()
 
-        # Convert QImage to numpy array
-        image = image.convertToFormat(QImage.Format.Format_ARGB32)
-        ptr = image.bits()
-        ptr.setsize(height * width * 4)
-        arr = np.frombuffer(ptr, dtype=np.uint8).reshape((height, width, 4))
+        # View the QImage pixels as a numpy array
+        if image.format() != QImage.Format.Format_ARGB32:
+            image = image.convertToFormat(QImage.Format.Format_ARGB32)
+        arr = qimage_to_array(image)
 
         # Get the brush color components
         brush_color = self.brush_color
@@ -949,20 +974,18 @@ class MaskTracingInterface(QWidget):
             local_mask = np.zeros((height, width), np.uint8)
             cv2.drawContours(local_mask, [target_contour], -1, 255, -1)
 
-        # Fill the region with the brush color
+        # Fill the region with the brush color, computing the region once
+        region = local_mask == 255
         if self.eraser_button.isChecked():
             # For eraser, set alpha to 0
-            arr[local_mask == 255, 3] = 0
+            arr[region, 3] = 0
         else:
-            # For brush, set the color and alpha
-            arr[local_mask == 255, 0] = b  # Blue component
-            arr[local_mask == 255, 1] = g  # Green component
-            arr[local_mask == 255, 2] = r  # Red component
-            arr[local_mask == 255, 3] = 255  # Alpha
+            # For brush, set the color (B, G, R) and alpha in one assignment
+            arr[region] = (b, g, r, 255)
 
         # Convert the numpy array back to QImage
         result_image = QImage(
-            arr.data, width, height, width * 4, QImage.Format.Format_RGBA8888
+            arr.data, width, height, arr.strides[0], QImage.Format.Format_RGBA8888
         )
 
         # Save for undo and update the mask pixmap
@@ -975,26 +998,33 @@ class MaskTracingInterface(QWidget):
             return
 
         method = self.norm_controls.method_combo.currentText()
-        img = cv2.imread(self.current_image_path)
-
         if method == "CLAHE":
             clip_limit = self.norm_controls.clip_slider.value() / 10.0
             tile_size = self.norm_controls.tile_slider.value()
-            enhanced = ImageNormalization.apply_clahe(
-                img, clip_limit=clip_limit, tile_size=(tile_size, tile_size)
-            )
+            params = {"clip_limit": clip_limit, "tile_size": (tile_size, tile_size)}
         else:  # Contrast Stretching
             lower = self.norm_controls.lower_slider.value()
             upper = self.norm_controls.upper_slider.value()
-            enhanced = ImageNormalization.apply_contrast_stretching(
-                img, lower_percentile=lower, upper_percentile=upper
-            )
+            params = {"lower_percentile": lower, "upper_percentile": upper}
 
-        # Convert to QPixmap and update display
-        rgb_img = cv2.cvtColor(enhanced, cv2.COLOR_BGR2RGB)
-        height, width, channel = rgb_img.shape
-        q_img = QImage(
-            rgb_img.data, width, height, width * 3, QImage.Format.Format_RGB888
+        # Decode and enhance in a worker so the UI stays responsive
+        thread = NormalizationThread(
+            self.current_image_path, self.source_image, method, params, self
         )
+        thread.result_ready.connect(self.on_normalization_ready)
+        thread.finished.connect(thread.deleteLater)
+        self.normalization_thread = thread
+        thread.start()
+
+    def on_normalization_ready(self, image_path, source_image, q_img):
+        # Ignore results from superseded requests or a previous image
+        if (
+            self.sender() is not self.normalization_thread
+            or image_path != self.current_image_path
+        ):
+            return
+
+        # Keep the decoded image so the next Apply skips the disk read
+        self.source_image = source_image
         self.image_pixmap = QPixmap.fromImage(q_img)
         self.update_display()
@@ -4,6 +4,7 @@ import cv2
 import numpy as np
 import os
 import re
+import time
 from datetime import datetime
 from PyQt6.QtCore import QThread, pyqtSignal
 
@@ -12,9 +13,11 @@ class RootLengthCalculatorThread(QThread):
     finished = pyqtSignal(str)
     progress = pyqtSignal(int)
 
-    def __init__(self, fake_images, output_dir):
+    def __init__(self, fake_images, output_dir=None):
         super().__init__()
-        self.fake_images = fake_images
+        # Snapshot so the caller can keep changing its dict while we run
+        self.fake_images = dict(fake_images)
+        # Defaults to the folder of the skeleton images, resolved in run()
         self.output_dir = output_dir
         print(f"Initialized calculator with {len(fake_images)} images")
 
@@ -72,6 +75,10 @@ class RootLengthCalculatorThread(QThread):
     def run(self):
         results = []
         total_images = len(self.fake_images)
+        output_dir = self.output_dir
+        if output_dir is None:
+            output_dir = os.path.dirname(next(iter(self.fake_images.values())))
+        last_progress = 0.0
 
         for i, (name, path) in enumerate(self.fake_images.items(), 1):
             try:
@@ -94,8 +101,11 @@ class RootLengthCalculatorThread(QThread):
 
                 results.append(result)
 
-                # Update progress
-                self.progress.emit(int((i / total_images) * 100))
+                # Update progress at most every 100 ms
+                now = time.monotonic()
+                if now - last_progress >= 0.1:
+                    self.progress.emit(int((i / total_images) * 100))
+                    last_progress = now
 
             except Exception as e:
                 print(f"Error processing image '{name}': {str(e)}")
@@ -111,19 +121,20 @@ class RootLengthCalculatorThread(QThread):
                     }
                 )
 
-        # Sort results
-        sorted_results = sorted(
-            results,
-            key=lambda x: (
-                x["Tube"] or float("inf"),
-                x["Date"] or "",
-                x["Time"] or "",
-                x["Position"] or float("inf"),
-            ),
-        )
+        # Always report completion, even if the last image failed
+        self.progress.emit(100)
+
+        # Sort results by tube, date, time and position with one lexsort over
+        # key arrays instead of building a Python key tuple per result
+        tubes = np.array([r["Tube"] or np.inf for r in results], dtype=float)
+        dates = np.array([r["Date"] or "" for r in results], dtype=str)
+        times = np.array([r["Time"] or "" for r in results], dtype=str)
+        positions = np.array([r["Position"] or np.inf for r in results], dtype=float)
+        order = np.lexsort((positions, times, dates, tubes))
+        sorted_results = [results[i] for i in order]
 
         # Save to CSV
-        csv_path = os.path.join(self.output_dir, "root_lengths.csv")
+        csv_path = os.path.join(output_dir, "root_lengths.csv")
         self.save_to_csv(sorted_results, csv_path)
         self.finished.emit(csv_path)
 
@@ -24,7 +24,10 @@ class DashServerThread(QThread):
 
     def run(self):
         try:
-            self.server = make_server("127.0.0.1", self.port, self.dash_app.app.server)
+            # Threaded so the page's parallel asset and callback requests overlap
+            self.server = make_server(
+                "127.0.0.1", self.port, self.dash_app.app.server, threaded=True
+            )
             self.port_assigned.emit(self.port)
             while not self._stop_event.is_set():
                 self.server.handle_request()
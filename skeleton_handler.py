@@ -61,11 +61,13 @@ class SkeletonHandler:
             return
 
         # Collect ALL fake images
-        fake_images = {}
-        for filename in os.listdir(output_dir):
-            if filename.endswith("_fake.png"):
-                base_name = filename.replace("_fake.png", "")
-                fake_images[base_name] = os.path.join(output_dir, filename)
+        suffix = "_fake.png"
+        with os.scandir(output_dir) as entries:
+            fake_images = {
+                entry.name[: -len(suffix)]: entry.path
+                for entry in entries
+                if entry.name.endswith(suffix) and entry.is_file()
+            }
 
         if not fake_images:
             QMessageBox.warning(
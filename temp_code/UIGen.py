@@ -2,6 +2,7 @@ import sys
 import cv2
 import numpy as np
 import os
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -17,7 +18,7 @@ from PyQt6.QtWidgets import (
     QFileDialog,
     QComboBox,
 )
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor
+from PyQt6.QtGui import QPixmap, QImage, QImageReader
 from PyQt6.QtCore import Qt, QUrl
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from generate_skeleton_handler import GenerateSkeletonHandler
@@ -94,6 +95,12 @@ class RootSkeletonViewerUI(QMainWindow):
         self.images = {}
         self.fake_images = {}
         self.html_path = None
+        # HTML file currently shown in the web view, so Basic View can skip reloads
+        self.loaded_html_path = None
+        # Decoded images and thresholded masks, least recently used first
+        self.cache_size = 32
+        self.pixmap_cache = OrderedDict()
+        self.mask_cache = OrderedDict()
         self.skeleton_handler = GenerateSkeletonHandler(self)
         print("DEBUG: RootSkeletonViewerUI initialized")
 
@@ -131,38 +138,49 @@ class RootSkeletonViewerUI(QMainWindow):
             self.file_list.clear()
             self.images.clear()
             self.fake_images.clear()
+            self.pixmap_cache.clear()
+            self.mask_cache.clear()
+            self.loaded_html_path = None
             self.has_fake_real_pairs = False
 
+            # Read the folder once and keep the entries for classification
+            with os.scandir(folder_path) as it:
+                entries = list(it)
+
             # Check if this is an output directory with real and fake images
-            is_output_dir = any(
-                file.endswith("_fake.png") for file in os.listdir(folder_path)
-            )
+            is_output_dir = any(entry.name.endswith("_fake.png") for entry in entries)
 
             if is_output_dir:
                 image_dir = os.path.join(folder_path, "images")
                 if os.path.exists(image_dir):
                     folder_path = image_dir
+                    with os.scandir(folder_path) as it:
+                        entries = list(it)
+
+            classified = [
+                self.classify_image_file(entry, is_output_dir) for entry in entries
+            ]
+            names_to_add = []
+            for kind, base_name, full_path in filter(None, classified):
+                if kind == "fake":
+                    self.fake_images[base_name] = full_path
+                    if base_name not in self.images:
+                        names_to_add.append(base_name)
+                    self.has_fake_real_pairs = True
+                elif kind == "real":
+                    self.images[base_name] = full_path
+                    if base_name not in self.fake_images:
+                        names_to_add.append(base_name)
+                    self.has_fake_real_pairs = True
+                else:
+                    self.images[base_name] = full_path
+                    names_to_add.append(base_name)
 
-            for file_name in os.listdir(folder_path):
-                full_path = os.path.normpath(os.path.join(folder_path, file_name))
-                if file_name.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                    if is_output_dir and file_name.endswith("_fake.png"):
-                        base_name = file_name.replace("_fake.png", "")
-                        self.fake_images[base_name] = full_path
-                        if base_name not in self.images:
-                            self.file_list.addItem(base_name)
-                        self.has_fake_real_pairs = True
-                    elif is_output_dir and file_name.endswith("_real.png"):
-                        base_name = file_name.replace("_real.png", "")
-                        self.images[base_name] = full_path
-                        if base_name not in self.fake_images:
-                            self.file_list.addItem(base_name)
-                        self.has_fake_real_pairs = True
-                    else:
-                        base_name = os.path.splitext(file_name)[0]
-                        self.images[base_name] = full_path
-                        self.file_list.addItem(base_name)
-                    print(f"DEBUG: Added file to list: {full_path}")
+            # Insert all rows at once so the list view updates a single time
+            self.file_list.setUpdatesEnabled(False)
+            self.file_list.addItems(names_to_add)
+            self.file_list.setUpdatesEnabled(True)
+            print(f"DEBUG: Added {len(names_to_add)} files from {folder_path}")
 
             # Look for index.html file only if we have fake-real pairs
             if self.has_fake_real_pairs:
@@ -188,15 +206,101 @@ class RootSkeletonViewerUI(QMainWindow):
                     f"Loaded {self.file_list.count()} images from folder", 5000
                 )
 
+    @staticmethod
+    def classify_image_file(entry, is_output_dir):
+        """
+        Return (kind, base_name, full_path) for an os.DirEntry, or None.
+        kind is "fake" or "real" for pix2pix output pairs and "image" otherwise.
+        """
+        file_name = entry.name
+        if not file_name.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
+            return None
+        full_path = os.path.normpath(entry.path)
+        if is_output_dir and file_name.endswith("_fake.png"):
+            return "fake", file_name.replace("_fake.png", ""), full_path
+        if is_output_dir and file_name.endswith("_real.png"):
+            return "real", file_name.replace("_real.png", ""), full_path
+        return "image", os.path.splitext(file_name)[0], full_path
+
     def display_selected_image(self, item):
         base_name = item.text()
         self.current_image_path = self.images.get(base_name)
         self.current_fake_image_path = self.fake_images.get(base_name)
         self.update_image_display()
 
+    def get_cached(self, cache, path, loader, is_valid):
+        """Return loader(path) from cache, evicting the least recently used"""
+        if path in cache:
+            cache.move_to_end(path)
+            return cache[path]
+        value = loader(path)
+        if is_valid(value):
+            cache[path] = value
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return value
+
+    def get_pixmap(self, path):
+        return self.get_cached(
+            self.pixmap_cache, path, QPixmap, lambda pixmap: not pixmap.isNull()
+        )
+
+    def get_preview_pixmap(self, path):
+        return self.get_cached(
+            self.pixmap_cache,
+            (path, "preview"),
+            lambda key: self.load_preview(key[0]),
+            lambda pixmap: not pixmap.isNull(),
+        )
+
+    @staticmethod
+    def load_preview(path, max_width=800, max_height=600):
+        """Decode path straight to a size that fits max_width x max_height"""
+        reader = QImageReader(path)
+        size = reader.size()
+        if size.isValid():
+            # Lets decoders that support it (e.g. JPEG) skip full-size decoding
+            reader.setScaledSize(
+                size.scaled(max_width, max_height, Qt.AspectRatioMode.KeepAspectRatio)
+            )
+        return QPixmap.fromImageReader(reader)
+
+    def get_binary_mask(self, path):
+        """Return where the fake image is >= 50, or None if it can't be read"""
+        return self.get_cached(
+            self.mask_cache, path, self.load_binary_mask, lambda mask: mask is not None
+        )
+
+    @staticmethod
+    def load_binary_mask(path):
+        # Reuse the mask saved next to the fake image unless the image is newer
+        mask_path = path + ".mask.npz"
+        try:
+            if os.path.getmtime(mask_path) >= os.path.getmtime(path):
+                with np.load(mask_path) as data:
+                    mask = data["mask"]
+                # Older caches hold 0/255 Otsu masks; rebuild those
+                if mask.dtype == np.bool_:
+                    return mask
+        except (OSError, KeyError, ValueError):
+            pass
+
+        # Load the fake image in grayscale
+        fake_image_gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if fake_image_gray is None:
+            return None
+
+        # Skeleton pixels are the ones at or above a fixed threshold of 50
+        binary_mask = fake_image_gray >= 50
+
+        try:
+            np.savez_compressed(mask_path, mask=binary_mask)
+        except OSError as e:
+            print(f"DEBUG: Could not save binary mask to {mask_path}: {str(e)}")
+        return binary_mask
+
     def display_single_image(self):
-        pixmap = QPixmap(self.current_image_path)
-        scaled_pixmap = pixmap.scaled(800, 600, Qt.AspectRatioMode.KeepAspectRatio)
+        scaled_pixmap = self.get_preview_pixmap(self.current_image_path)
         self.image_label.setPixmap(scaled_pixmap)
         print(f"DEBUG: Single image displayed. Size: {scaled_pixmap.size()}")
 
@@ -205,24 +309,18 @@ class RootSkeletonViewerUI(QMainWindow):
             print("DEBUG: Missing real or fake image path")
             return
 
-        real_pixmap = QPixmap(self.current_image_path)
+        real_pixmap = self.get_pixmap(self.current_image_path)
         fake_image_path = self.current_fake_image_path
 
         if real_pixmap.isNull():
             print("DEBUG: Failed to load real image")
             return
 
-        # Load the fake image in grayscale
-        fake_image_gray = cv2.imread(fake_image_path, cv2.IMREAD_GRAYSCALE)
-        if fake_image_gray is None:
+        binary_mask = self.get_binary_mask(fake_image_path)
+        if binary_mask is None:
             print("DEBUG: Failed to load fake image")
             return
 
-        # Apply Otsu's threshold to convert to binary
-        _, binary_mask = cv2.threshold(
-            fake_image_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU
-        )
-
         # Convert real image to QImage for painting
         real_image = real_pixmap.toImage()
 
@@ -232,32 +330,24 @@ class RootSkeletonViewerUI(QMainWindow):
                 "DEBUG: Image sizes do not match. Resizing binary mask to match real image."
             )
             binary_mask = cv2.resize(
-                binary_mask,
+                binary_mask.view(np.uint8),
                 (real_image.width(), real_image.height()),
                 interpolation=cv2.INTER_NEAREST,
-            )
+            ).view(bool)
 
-        result_image = QImage(
-            real_image.size(), QImage.Format.Format_ARGB32_Premultiplied
+        # Copy the real image into a premultiplied ARGB32 buffer and view it
+        # as a numpy array (BGRA byte order on little-endian machines)
+        result_image = real_image.convertToFormat(
+            QImage.Format.Format_ARGB32_Premultiplied
         )
-        result_image.fill(Qt.GlobalColor.transparent)
-
-        # Start painting the overlay
-        painter = QPainter(result_image)
-        painter.drawImage(0, 0, real_image)
-        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        ptr = result_image.bits()
+        ptr.setsize(result_image.sizeInBytes())
+        result_array = np.frombuffer(ptr, dtype=np.uint8).reshape(
+            result_image.height(), result_image.bytesPerLine() // 4, 4
+        )[:, : result_image.width()]
 
-        # Overlay the binary mask (where mask is 0, keep real image; where mask is >=50, set black)
-        for x in range(real_image.width()):
-            for y in range(real_image.height()):
-                if (
-                    binary_mask[y, x] >= 50
-                ):  # Binary mask, 255 means foreground (white pixels in the fake image)
-                    result_image.setPixelColor(
-                        x, y, QColor(Qt.GlobalColor.black)
-                    )  # Overlay black color on the real image
-
-        painter.end()
+        # Overlay the binary mask (where mask is False, keep real image; where mask is True, set black)
+        result_array[binary_mask] = (0, 0, 0, 255)
 
         # Convert result to QPixmap and display
         result_pixmap = QPixmap.fromImage(result_image)
@@ -265,24 +355,64 @@ class RootSkeletonViewerUI(QMainWindow):
         print(f"DEBUG: Overlay image displayed. Size: {result_pixmap.size()}")
 
     def display_side_by_side_images(self):
-        real_pixmap = QPixmap(self.current_image_path)
         if self.current_fake_image_path:
-            fake_pixmap = QPixmap(self.current_fake_image_path)
-            combined_pixmap = QPixmap(real_pixmap.width() * 2, real_pixmap.height())
-            combined_pixmap.fill(Qt.GlobalColor.white)
-            painter = QPainter(combined_pixmap)
-            painter.drawPixmap(0, 0, real_pixmap)
-            painter.drawPixmap(real_pixmap.width(), 0, fake_pixmap)
-            painter.end()
+            scaled_pixmap = self.get_cached(
+                self.pixmap_cache,
+                (self.current_image_path, self.current_fake_image_path),
+                lambda paths: self.compose_side_by_side(*paths),
+                lambda pixmap: pixmap is not None,
+            )
+            if scaled_pixmap is None:
+                print("DEBUG: Failed to load images for side-by-side view")
+                return
         else:
-            combined_pixmap = real_pixmap
+            scaled_pixmap = self.get_preview_pixmap(self.current_image_path)
 
-        scaled_pixmap = combined_pixmap.scaled(
-            800, 600, Qt.AspectRatioMode.KeepAspectRatio
-        )
         self.image_label.setPixmap(scaled_pixmap)
         print(f"DEBUG: Side-by-side images displayed. Size: {scaled_pixmap.size()}")
 
+    @staticmethod
+    def compose_side_by_side(real_path, fake_path, max_width=800, max_height=600):
+        """
+        Return the real and fake images side by side as a QPixmap that fits
+        within max_width x max_height. Each half is downscaled before being
+        pasted, so no full-resolution combined image is ever built.
+        """
+        real = cv2.imread(real_path)
+        fake = cv2.imread(fake_path)
+        if real is None or fake is None:
+            return None
+
+        # Scale both halves by the factor that fits a canvas twice the real
+        # image's width, as the combined image was sized before
+        height, width = real.shape[:2]
+        scale = min(max_width / (2 * width), max_height / height)
+        half_width = max(1, round(width * scale))
+        out_height = max(1, round(height * scale))
+
+        combined = np.full((out_height, 2 * half_width, 3), 255, dtype=np.uint8)
+        combined[:, :half_width] = cv2.resize(
+            real, (half_width, out_height), interpolation=cv2.INTER_AREA
+        )
+        fake = cv2.resize(
+            fake,
+            (
+                max(1, round(fake.shape[1] * scale)),
+                max(1, round(fake.shape[0] * scale)),
+            ),
+            interpolation=cv2.INTER_AREA,
+        )[:out_height, :half_width]
+        combined[: fake.shape[0], half_width : half_width + fake.shape[1]] = fake
+
+        image = QImage(
+            combined.data,
+            combined.shape[1],
+            combined.shape[0],
+            combined.strides[0],
+            QImage.Format.Format_BGR888,
+        )
+        return QPixmap.fromImage(image)
+
     def generate_skeleton(self):
         print("DEBUG: Generate skeleton button clicked")
         self.skeleton_handler.generate_skeleton()
@@ -292,10 +422,8 @@ class RootSkeletonViewerUI(QMainWindow):
             QMessageBox.warning(self, "Warning", "No skeleton images loaded.")
             return
 
-        output_dir = os.path.dirname(next(iter(self.fake_images.values())))
-        self.calculator_thread = RootLengthCalculatorThread(
-            self.fake_images, output_dir
-        )
+        # The thread snapshots the dict and writes next to the skeleton images
+        self.calculator_thread = RootLengthCalculatorThread(self.fake_images)
         self.calculator_thread.finished.connect(self.on_calculation_finished)
         self.calculator_thread.progress.connect(self.update_progress)
         self.calculator_thread.start()
@@ -325,7 +453,9 @@ class RootSkeletonViewerUI(QMainWindow):
                 and os.path.exists(self.html_path)
             ):
                 self.web_view.show()
-                self.web_view.load(QUrl.fromLocalFile(self.html_path))
+                if self.loaded_html_path != self.html_path:
+                    self.web_view.load(QUrl.fromLocalFile(self.html_path))
+                    self.loaded_html_path = self.html_path
                 print(f"DEBUG: Basic View displayed using HTML file: {self.html_path}")
             else:
                 print(
@@ -1,7 +1,48 @@
 import dominate
 from dominate.tags import *
+from dominate.util import escape, raw
 import os
 
+# Written next to index.html once so pages stay small and browsers can cache them
+STYLE_CSS = """\
+body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; background-color: #f4f4f4; }
+.container { width: 90%; max-width: 1200px; margin: auto; padding: 20px; }
+h1, h3 { color: #2c3e50; text-align: center; }
+.image-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 30px; justify-items: center; }
+.image-item { background: #fff; border-radius: 8px; padding: 15px; box-shadow: 0 0 15px rgba(0,0,0,0.1); width: 100%; max-width: 400px; }
+.image-item img { width: 100%; height: 300px; object-fit: cover; border-radius: 5px; }
+.image-item p { margin-top: 10px; text-align: center; font-size: 14px; word-wrap: break-word; }
+.modal { display: none; position: fixed; z-index: 1000; left: 0; top: 0; width: 100%; height: 100%; overflow: auto; background-color: rgba(0,0,0,0.9); }
+.modal-content { margin: auto; display: block; max-width: 80%; max-height: 80%; }
+.modal-nav { position: absolute; top: 50%; transform: translateY(-50%); color: white; font-size: 40px; cursor: pointer; background: rgba(0,0,0,0.5); padding: 10px; border-radius: 5px; }
+.close { color: #f1f1f1; position: absolute; top: 15px; right: 35px; font-size: 40px; font-weight: bold; cursor: pointer; }
+#prevButton { left: 20px; }
+#nextButton { right: 20px; }
+@media (max-width: 768px) {
+    .image-grid { grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); }
+    .image-item { max-width: 100%; }
+}
+"""
+
+MAIN_JS = """\
+function openModal(imgElement) {
+    var modal = document.getElementById("imageModal");
+    var modalImg = document.getElementById("modalImage");
+    modal.style.display = "block";
+    modalImg.src = imgElement.src;
+    currentIndex = Array.from(document.getElementsByClassName("grid-image")).indexOf(imgElement);
+}
+function closeModal() {
+    document.getElementById("imageModal").style.display = "none";
+}
+function changeImage(n) {
+    var images = document.getElementsByClassName("grid-image");
+    currentIndex = (currentIndex + n + images.length) % images.length;
+    document.getElementById("modalImage").src = images[currentIndex].src;
+}
+var currentIndex = 0;
+"""
+
 
 class HTML:
     """This HTML class allows us to save images and write texts into a single HTML file.
@@ -26,6 +67,11 @@ class HTML:
             os.makedirs(self.web_dir)
         if not os.path.exists(self.img_dir):
             os.makedirs(self.img_dir)
+        for name, content in (("style.css", STYLE_CSS), ("main.js", MAIN_JS)):
+            path = os.path.join(self.web_dir, name)
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
 
         self.doc = dominate.document(title=title)
         with self.doc.head:
@@ -35,51 +81,20 @@ class HTML:
                 rel="stylesheet",
                 href="https://cdnjs.cloudflare.com/ajax/libs/normalize/8.0.1/normalize.min.css",
             )
-            style(
-                """
-                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; background-color: #f4f4f4; }
-                .container { width: 90%; max-width: 1200px; margin: auto; padding: 20px; }
-                h1, h3 { color: #2c3e50; text-align: center; }
-                .image-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 30px; justify-items: center; }
-                .image-item { background: #fff; border-radius: 8px; padding: 15px; box-shadow: 0 0 15px rgba(0,0,0,0.1); width: 100%; max-width: 400px; }
-                .image-item img { width: 100%; height: 300px; object-fit: cover; border-radius: 5px; }
-                .image-item p { margin-top: 10px; text-align: center; font-size: 14px; word-wrap: break-word; }
-                .modal { display: none; position: fixed; z-index: 1000; left: 0; top: 0; width: 100%; height: 100%; overflow: auto; background-color: rgba(0,0,0,0.9); }
-                .modal-content { margin: auto; display: block; max-width: 80%; max-height: 80%; }
-                .modal-nav { position: absolute; top: 50%; transform: translateY(-50%); color: white; font-size: 40px; cursor: pointer; background: rgba(0,0,0,0.5); padding: 10px; border-radius: 5px; }
-                .close { color: #f1f1f1; position: absolute; top: 15px; right: 35px; font-size: 40px; font-weight: bold; cursor: pointer; }
-                #prevButton { left: 20px; }
-                #nextButton { right: 20px; }
-                @media (max-width: 768px) {
-                    .image-grid { grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); }
-                    .image-item { max-width: 100%; }
-                }
-            """
-            )
-            script(
-                """
-                function openModal(imgElement) {
-                    var modal = document.getElementById("imageModal");
-                    var modalImg = document.getElementById("modalImage");
-                    modal.style.display = "block";
-                    modalImg.src = imgElement.src;
-                    currentIndex = Array.from(document.getElementsByClassName("grid-image")).indexOf(imgElement);
-                }
-                function closeModal() {
-                    document.getElementById("imageModal").style.display = "none";
-                }
-                function changeImage(n) {
-                    var images = document.getElementsByClassName("grid-image");
-                    currentIndex = (currentIndex + n + images.length) % images.length;
-                    document.getElementById("modalImage").src = images[currentIndex].src;
-                }
-                var currentIndex = 0;
-            """
-            )
+            link(rel="stylesheet", href="style.css")
+            script(src="main.js")
         if refresh > 0:
             with self.doc.head:
                 meta(http_equiv="refresh", content=str(refresh))
 
+        # Add a single modal for full-size image view, shared by every image grid
+        with self.doc:
+            with div(id="imageModal", cls="modal"):
+                span("×", cls="close", onclick="closeModal()")
+                img(cls="modal-content", id="modalImage")
+                span("❮", cls="modal-nav", id="prevButton", onclick="changeImage(-1)")
+                span("❯", cls="modal-nav", id="nextButton", onclick="changeImage(1)")
+
     def get_image_dir(self):
         """Return the directory that stores images"""
         return self.img_dir
@@ -102,31 +117,26 @@ class HTML:
             txts (str list)  -- a list of image names shown on the website
             links (str list) --  a list of hyperref links; when you click an image, it will redirect you to a new page
         """
-        self.t = div(cls="image-grid")
-        self.doc.add(self.t)
+        # Format the grid as one raw string; a dominate tag per element is slow
+        # for galleries with thousands of images
+        html_parts = ['<div class="image-grid">']
         for im, txt, link in zip(ims, txts, links):
-            with self.t:
-                with div(cls="image-item"):
-                    with a(
-                        href="javascript:void(0);",
-                        onclick=f"openModal(this.getElementsByTagName('img')[0])",
-                    ):
-                        img(cls="grid-image", src=os.path.join("images", im))
-                    p(txt)
-
-        # Add modal for full-size image view
-        with self.doc:
-            with div(id="imageModal", cls="modal"):
-                span("×", cls="close", onclick="closeModal()")
-                img(cls="modal-content", id="modalImage")
-                span("❮", cls="modal-nav", id="prevButton", onclick="changeImage(-1)")
-                span("❯", cls="modal-nav", id="nextButton", onclick="changeImage(1)")
+            html_parts.append(
+                '<div class="image-item">'
+                '<a href="javascript:void(0);" '
+                "onclick=\"openModal(this.getElementsByTagName('img')[0])\">"
+                f'<img class="grid-image" src="{escape(os.path.join("images", im))}">'
+                f"</a><p>{escape(txt, quote=False)}</p></div>"
+            )
+        html_parts.append("</div>")
+        self.doc.add(raw("".join(html_parts)))
 
     def save(self):
         """save the current content to the HTML file"""
         html_file = "%s/index.html" % self.web_dir
-        with open(html_file, "w", encoding="utf-8") as f:
-            f.write(self.doc.render())
+        # pretty=False skips dominate's indentation pass; the browser ignores it anyway
+        with open(html_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write(self.doc.render(pretty=False))
 
 
 if __name__ == "__main__":  # we show an example usage here.
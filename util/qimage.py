@@ -0,0 +1,13 @@
+"""This module contains helpers for sharing pixel data between QImage and numpy"""
+import numpy as np
+
+
+def qimage_to_array(image):
+    """View a 32-bit QImage as an (height, width, 4) uint8 array without copying."""
+    ptr = image.bits()
+    ptr.setsize(image.sizeInBytes())
+    # Rows are bytesPerLine() long, which may include padding past width * 4
+    arr = np.frombuffer(ptr, dtype=np.uint8).reshape(
+        (image.height(), image.bytesPerLine() // 4, 4)
+    )
+    return arr[:, : image.width()]